@@ -1,60 +1,467 @@
 import numpy as np
-from flask import Flask, request, jsonify
-from PIL import Image
-from tensorflow.keras.utils import img_to_array
-from tensorflow.keras.models import load_model
+from flask import Flask, request
 from flask_cors import CORS
 import os
 import redis
-from collections import Counter
+from collections import OrderedDict
 from datetime import datetime
-import json
+import io
+import orjson
 import shutil
 import uuid
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 app = Flask(__name__)
 CORS(app)
 
 # Constants
 MODEL_PATH = "modelf1.h5"
+TFLITE_MODEL_PATH = "modelf1.tflite"
+ONNX_MODEL_PATH = "modelf1.onnx"
+OPENVINO_MODEL_PATH = "modelf1_ov.xml"
 SESSIONS_DIR = "session_images"
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+ALLOWED_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'gif'})
+MAX_FILENAME_LENGTH = 255
+JPEG_MAGIC = b'\xff\xd8\xff'
 EMOTIONS = ['Angry', 'Disgust', 'Fear', 'Happy', 'Sad', 'Surprise', 'Neutral']
+EMOTION_INDEX = {emotion: index for index, emotion in enumerate(EMOTIONS)}
+POSITIVE_EMOTIONS = [EMOTION_INDEX[emotion] for emotion in ('Happy', 'Surprise')]
+NEGATIVE_EMOTIONS = [EMOTION_INDEX[emotion] for emotion in ('Sad', 'Angry', 'Fear', 'Disgust')]
+
+# Inference threading configuration, sized to the expected inference concurrency
+INFERENCE_THREADS = int(os.environ.get('INFERENCE_THREADS', 2))
+
+# Inference batching configuration
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 16))
+BATCH_WINDOW_SECONDS = float(os.environ.get('BATCH_WINDOW_MS', 10)) / 1000
+INFERENCE_TIMEOUT_SECONDS = 2.0
+INFERENCE_QUEUE_SIZE = MAX_BATCH_SIZE * 8  # Frames waiting for the model beyond this are rejected
+
+# How long ending or clearing a session waits for its in-flight frame writes, and how often it checks
+FRAME_WRITE_WAIT_SECONDS = 10
+FRAME_WRITE_POLL_SECONDS = 0.05
+PENDING_WRITES_TTL_SECONDS = 60
+
+# Number of sessions fetched from Redis per round-trip when listing sessions
+SESSION_LIST_CHUNK_SIZE = 100
+
+# Inference cache configuration for repeated, near-identical video frames
+INFERENCE_CACHE_SIZE = int(os.environ.get('INFERENCE_CACHE_SIZE', 2048))
+INFERENCE_CACHE_REFRESH_RATE = 32  # Re-run the model on 1 in N cache hits to refresh the entry
+
+# Seconds to keep a session's Redis data after it ends (0 keeps it forever)
+SESSION_TTL_SECONDS = int(os.environ.get('SESSION_TTL_SECONDS', 0))
+SESSION_PURGE_INTERVAL_SECONDS = 300  # How often the images of expired sessions are deleted
 
 # Redis Configuration
 REDIS_HOST = os.environ.get('REDIS_HOST', 'localhost')
 REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))    
 REDIS_DB = int(os.environ.get('REDIS_DB', 0))
 REDIS_PASSWORD = os.environ.get('REDIS_PASSWORD', None)
+REDIS_UNIX_SOCKET = os.environ.get('REDIS_UNIX_SOCKET')
+REDIS_MAX_CONNECTIONS = 64
+
+# Initialize Redis connection pool, using the unix socket when one is configured
+if REDIS_UNIX_SOCKET:
+    redis_pool = redis.ConnectionPool(
+        connection_class=redis.UnixDomainSocketConnection,
+        path=REDIS_UNIX_SOCKET,
+        db=REDIS_DB,
+        password=REDIS_PASSWORD,
+        decode_responses=True,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        health_check_interval=30
+    )
+else:
+    redis_pool = redis.ConnectionPool(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        db=REDIS_DB,
+        password=REDIS_PASSWORD,
+        decode_responses=True,  # Automatically decode responses to strings
+        max_connections=REDIS_MAX_CONNECTIONS,
+        socket_keepalive=True,
+        health_check_interval=30
+    )
 
 # Initialize Redis client
-redis_client = redis.Redis(
-    host=REDIS_HOST,
-    port=REDIS_PORT,
-    db=REDIS_DB,
-    password=REDIS_PASSWORD,
-    decode_responses=True  # Automatically decode responses to strings
-)
+redis_client = redis.Redis(connection_pool=redis_pool)
 
 # Create necessary directories
 os.makedirs(SESSIONS_DIR, exist_ok=True)
 
-# Load model
-if not os.path.exists(MODEL_PATH):
-    raise FileNotFoundError(f"Model file not found: {MODEL_PATH}")
-model = load_model(MODEL_PATH)
+# Batch sizes that inference batches are padded up to, so backends with fixed input shapes only see a few shapes
+BATCH_BUCKETS = sorted({min(2 ** i, MAX_BATCH_SIZE) for i in range(MAX_BATCH_SIZE.bit_length() + 1)})
+
+def pad_batch(batch):
+    """Pad a batch with blank frames up to the nearest batch bucket"""
+    bucket = next(size for size in BATCH_BUCKETS if size >= len(batch))
+    if bucket > len(batch):
+        batch = np.concatenate([batch, np.zeros((bucket - len(batch), 48, 48, 1), dtype=batch.dtype)])
+    return batch
+
+def load_keras_predictor(model_path):
+    """Load the Keras model and return a function that predicts a batch of frames"""
+    import tensorflow as tf
+    from tensorflow.keras.models import load_model
+
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model file not found: {model_path}")
+    
+    # Must be set before TensorFlow initializes its runtime
+    tf.config.threading.set_intra_op_parallelism_threads(INFERENCE_THREADS)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    model = load_model(model_path, compile=False)
+    model.trainable = False
+
+    @tf.function(jit_compile=True)
+    def infer(batch):
+        """Run the model in inference mode as a single XLA-compiled graph"""
+        return model(batch, training=False)
+
+    # XLA compiles once per input shape, so batches are padded up to the batch buckets.
+    # Each size gets its own concrete function, called directly to skip tf.function's
+    # signature matching, and is run once so XLA compiles it before the first request.
+    concrete_fns = {}
+    for batch_size in BATCH_BUCKETS:
+        concrete_fns[batch_size] = infer.get_concrete_function(tf.TensorSpec([batch_size, 48, 48, 1], tf.float32))
+        concrete_fns[batch_size](tf.zeros((batch_size, 48, 48, 1)))
+
+    def predict(batch):
+        padded = pad_batch(batch)
+        return concrete_fns[len(padded)](tf.constant(padded, dtype=tf.float32)).numpy()[:len(batch)]
+
+    return predict
+
+def load_tflite_predictor(model_path):
+    """Load a quantized TFLite model and return a function that predicts a batch of frames"""
+    # The standalone tflite_runtime package avoids importing all of TensorFlow
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+
+    # Keep one interpreter per batch bucket, so tensors are only ever allocated once.
+    # Interpreters are not thread-safe; they are only ever invoked from the inference worker thread.
+    interpreters = {}
+    for batch_size in BATCH_BUCKETS:
+        interpreter = Interpreter(model_path=model_path, num_threads=INFERENCE_THREADS)
+        input_index = interpreter.get_input_details()[0]['index']
+        interpreter.resize_tensor_input(input_index, [batch_size, 48, 48, 1])
+        interpreter.allocate_tensors()
+        interpreters[batch_size] = interpreter
+
+    input_details = interpreter.get_input_details()[0]
+    output_details = interpreter.get_output_details()[0]
+    input_scale, input_zero_point = input_details['quantization']
+    output_scale, output_zero_point = output_details['quantization']
+
+    def predict(batch):
+        count = len(batch)
+        batch = pad_batch(batch)
+        interpreter = interpreters[len(batch)]
+
+        if input_details['dtype'] != np.float32:
+            dtype_info = np.iinfo(input_details['dtype'])
+            batch = np.clip(np.round(batch / input_scale + input_zero_point),
+                            dtype_info.min, dtype_info.max)
+        interpreter.set_tensor(input_details['index'], batch.astype(input_details['dtype']))
+        interpreter.invoke()
+        predictions = interpreter.get_tensor(output_details['index'])[:count]
+
+        if output_details['dtype'] != np.float32:
+            predictions = (predictions.astype(np.float32) - output_zero_point) * output_scale
+        return predictions
+
+    return predict
+
+def load_onnx_predictor(model_path):
+    """Load an ONNX export of the model into ONNX Runtime and return a function that predicts a batch of frames"""
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = INFERENCE_THREADS
+    options.inter_op_num_threads = 1
+    session = ort.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+    input_name = session.get_inputs()[0].name
+    output_name = session.get_outputs()[0].name
+
+    # Trigger ORT's lazy initialization before the first request
+    session.run([output_name], {input_name: np.zeros((1, 48, 48, 1), dtype=np.float32)})
+
+    def predict(batch):
+        return session.run([output_name], {input_name: batch})[0]
+
+    return predict
+
+def load_openvino_predictor(model_path):
+    """Compile an OpenVINO IR of the model for the CPU and return a function that predicts a batch of frames"""
+    import openvino as ov
+
+    core = ov.Core()
+    model = core.read_model(model_path)
+    model.reshape([-1, 48, 48, 1])
+    compiled = core.compile_model(model, 'CPU', {
+        'PERFORMANCE_HINT': 'LATENCY',
+        'INFERENCE_NUM_THREADS': INFERENCE_THREADS
+    })
+    output = compiled.output(0)
+    # The infer request is not thread-safe; it is only ever used from the inference worker thread
+    infer_request = compiled.create_infer_request()
+
+    def predict(batch):
+        return infer_request.infer({0: batch})[output]
+
+    return predict
+
+def load_predictor():
+    """Pick the fastest available inference backend: OpenVINO, ONNX Runtime, TFLite, then Keras"""
+    if os.path.exists(OPENVINO_MODEL_PATH):
+        try:
+            return load_openvino_predictor(OPENVINO_MODEL_PATH)
+        except ImportError:
+            print("openvino is not installed, ignoring OpenVINO model")
+    if os.path.exists(ONNX_MODEL_PATH):
+        try:
+            return load_onnx_predictor(ONNX_MODEL_PATH)
+        except ImportError:
+            print("onnxruntime is not installed, ignoring ONNX model")
+    if os.path.exists(TFLITE_MODEL_PATH):
+        return load_tflite_predictor(TFLITE_MODEL_PATH)
+    return load_keras_predictor(MODEL_PATH)
+
+# Queue of (image, Future) pairs waiting to be run through the model
+inference_queue = queue.Queue(maxsize=INFERENCE_QUEUE_SIZE)
+
+class InferenceUnavailable(Exception):
+    """Raised when a frame can't be run through the model in time"""
+
+def inference_worker(predict_batch):
+    """Coalesce queued frames into batches and run them through the model"""
+    while True:
+        items = [inference_queue.get()]
+        deadline = time.monotonic() + BATCH_WINDOW_SECONDS
+        
+        # Collect more frames until the batch is full or the window closes
+        while len(items) < MAX_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(inference_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        # Skip frames whose requests have already timed out and cancelled them
+        items = [(image, future) for image, future in items if future.set_running_or_notify_cancel()]
+        if not items:
+            continue
+        
+        try:
+            batch = np.stack([image for image, _ in items]).astype(np.float32, copy=False)
+            predictions = predict_batch(batch)
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            continue
+        
+        for (_, future), prediction in zip(items, predictions):
+            future.set_result(prediction)
+
+# Model is loaded on first use (or by gunicorn's post_worker_init hook) so the master never imports TensorFlow
+predictor = None
+predictor_lock = threading.Lock()
+
+def get_predictor():
+    """Load the inference backend and start the inference worker on first use"""
+    global predictor
+    if predictor is None:
+        with predictor_lock:
+            if predictor is None:
+                predict_batch = load_predictor()
+                threading.Thread(target=inference_worker, args=(predict_batch,), daemon=True).start()
+                predictor = predict_batch
+    return predictor
+
+# Shared pool for decoding uploads; OpenCV and PIL release the GIL while decoding and resizing
+preprocess_pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+def decode_face_image(data):
+    """Decode uploaded image bytes into a 48x48 grayscale uint8 array"""
+    import cv2
+
+    if data[:3] == JPEG_MAGIC:
+        # Let libjpeg decode straight to grayscale at the smallest DCT scale that is still at least 48x48
+        from PIL import Image
+        img = Image.open(io.BytesIO(data))
+        img.draft('L', (48, 48))
+        gray = np.asarray(img.convert('L'))
+        return cv2.resize(gray, (48, 48), interpolation=cv2.INTER_AREA)
+
+    # Decode straight to grayscale so no separate color conversion is needed
+    gray = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        # OpenCV can't decode every allowed format (e.g. GIF), fall back to PIL and
+        # box-resize there so only the 48x48 result is ever converted to an array
+        from PIL import Image
+        img = Image.open(io.BytesIO(data)).convert('L').resize((48, 48), Image.BOX)
+        return np.asarray(img, dtype=np.uint8)
+    return cv2.resize(gray, (48, 48), interpolation=cv2.INTER_AREA)
+
+# Background pool that records frames in Redis and on disk after the response is sent
+persist_pool = ThreadPoolExecutor(max_workers=8)
+
+def save_frame_image(img, img_path):
+    """Write a frame image to disk as JPEG"""
+    import cv2
+
+    if not cv2.imwrite(img_path, img, [cv2.IMWRITE_JPEG_QUALITY, 85]):
+        raise IOError(f"Could not write image: {img_path}")
+
+def persist_frame(session_id, question_id, frame_id, timestamp, emotion, confidence, img, img_path):
+    """Record a processed frame in Redis and save its image"""
+    try:
+        # Don't recreate the data of a session that was cleared while this frame was in flight
+        if not redis_client.exists(f"session:{session_id}"):
+            return
+        
+        # Append frame to question's frame stream and update frame counts in a single round-trip
+        with redis_client.pipeline(transaction=False) as pipe:
+            pipe.xadd(f"question:{question_id}:stream", {
+                "frame_id": frame_id,
+                "timestamp": timestamp,
+                "emotion": emotion,
+                "confidence": confidence
+            })
+            pipe.hincrby(f"session:{session_id}", "total_images", 1)
+            pipe.hincrby(f"question:{question_id}", "total_frames", 1)
+            
+            # Keep running aggregates so results don't need to scan every frame
+            pipe.hincrby(f"question:{question_id}:emotions", emotion, 1)
+            pipe.hincrbyfloat(f"question:{question_id}:confidence", "sum", confidence)
+            pipe.hincrby(f"question:{question_id}:confidence", "count", 1)
+            pipe.execute()
+        
+        save_frame_image(img, img_path)
+    finally:
+        release_frame_write(session_id)
+
+def release_frame_write(session_id):
+    """Stop counting a frame write, counted by get_session_status_and_question, as pending"""
+    with redis_client.pipeline(transaction=False) as pipe:
+        pipe.decr(f"session:{session_id}:pending_writes")
+        pipe.expire(f"session:{session_id}:pending_writes", PENDING_WRITES_TTL_SECONDS)
+        pipe.execute()
+
+def submit_frame_write(session_id, *args):
+    """Queue a frame to be persisted in the background"""
+    persist_pool.submit(persist_frame, session_id, *args).add_done_callback(report_frame_write)
+
+def report_frame_write(future):
+    """Report a failed background frame write"""
+    error = future.exception()
+    if error:
+        print(f"Error persisting frame: {error}")
+
+def wait_for_frame_writes(session_id):
+    """Block until all in-flight frame writes for a session, from any worker process, have completed"""
+    deadline = time.monotonic() + FRAME_WRITE_WAIT_SECONDS
+    while int(redis_client.get(f"session:{session_id}:pending_writes") or 0) > 0:
+        if time.monotonic() > deadline:
+            print(f"Timed out waiting for frame writes of session {session_id}")
+            return
+        time.sleep(FRAME_WRITE_POLL_SECONDS)
+
+def predict_emotion(img_pixels):
+    """Queue a single preprocessed frame for batched inference and wait for its prediction"""
+    # Load the model in the request thread so loading time doesn't count against the timeout
+    get_predictor()
+    future = Future()
+    try:
+        inference_queue.put_nowait((img_pixels, future))
+    except queue.Full:
+        raise InferenceUnavailable("Inference queue is full") from None
+    
+    try:
+        return future.result(timeout=INFERENCE_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        # Cancel the frame so the inference worker doesn't spend a batch slot on it
+        future.cancel()
+        raise InferenceUnavailable("Inference timed out") from None
+
+# Predictions keyed by frame fingerprint, in least-recently-used order
+inference_cache = OrderedDict()
+inference_cache_lock = threading.Lock()
+inference_cache_stats = {"hits": 0, "misses": 0}
+
+def frame_fingerprint(img):
+    """Average hash of a 48x48 grayscale frame, shared by near-identical frames"""
+    return np.packbits(img > img.mean()).tobytes()
+
+def predict_emotion_cached(img, img_pixels):
+    """Predict a frame's emotion, reusing the prediction of a near-identical earlier frame"""
+    if INFERENCE_CACHE_SIZE <= 0:
+        return predict_emotion(img_pixels)
+    
+    key = frame_fingerprint(img)
+    with inference_cache_lock:
+        prediction = inference_cache.get(key)
+        if prediction is not None and random.randrange(INFERENCE_CACHE_REFRESH_RATE):
+            inference_cache.move_to_end(key)
+            inference_cache_stats["hits"] += 1
+            return prediction
+        inference_cache_stats["misses"] += 1
+    
+    prediction = predict_emotion(img_pixels)
+    with inference_cache_lock:
+        inference_cache[key] = prediction
+        inference_cache.move_to_end(key)
+        if len(inference_cache) > INFERENCE_CACHE_SIZE:
+            inference_cache.popitem(last=False)
+    return prediction
+
+def json_response(payload):
+    """Build a JSON response, serialized with orjson"""
+    return app.response_class(orjson.dumps(payload), mimetype='application/json')
 
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    if len(filename) > MAX_FILENAME_LENGTH:
+        return False
+    dot = filename.rfind('.')
+    return dot != -1 and filename[dot + 1:].lower() in ALLOWED_EXTENSIONS
+
+def emotion_count_array(emotion_counts):
+    """Convert an emotion -> count mapping into a count array ordered like EMOTIONS"""
+    counts = np.zeros(len(EMOTIONS), dtype=np.int64)
+    for emotion, count in emotion_counts.items():
+        counts[EMOTION_INDEX[emotion]] += int(count)
+    return counts
+
+def emotion_distribution(counts):
+    """Convert a count array back into an emotion -> count mapping of the detected emotions"""
+    return {EMOTIONS[index]: int(count) for index, count in enumerate(counts) if count > 0}
 
-def analyze_emotion_trend(emotion_counts):
-    total = sum(emotion_counts.values())
+def summarize_emotion_counts(counts):
+    """Get the most and least common detected emotions and the number of distinct emotions"""
+    detected = counts > 0
+    most_common = EMOTIONS[int(counts.argmax())]
+    least_common = EMOTIONS[int(np.where(detected, counts, counts.max() + 1).argmin())]
+    return most_common, least_common, int(detected.sum())
+
+def analyze_emotion_trend(counts):
+    total = counts.sum()
     if total == 0:
         return "No emotions detected"
         
-    positive_emotions = (emotion_counts.get('Happy', 0) + emotion_counts.get('Surprise', 0)) / total
-    negative_emotions = (emotion_counts.get('Sad', 0) + emotion_counts.get('Angry', 0) + 
-                       emotion_counts.get('Fear', 0) + emotion_counts.get('Disgust', 0)) / total
+    positive_emotions = counts[POSITIVE_EMOTIONS].sum() / total
+    negative_emotions = counts[NEGATIVE_EMOTIONS].sum() / total
     
     if positive_emotions > 0.6:
         return "Predominantly positive emotions"
@@ -63,8 +470,7 @@ def analyze_emotion_trend(emotion_counts):
     else:
         return "Mixed emotional state"
 
-def get_emotion_variability(emotion_counts):
-    unique_emotions = len([count for count in emotion_counts.values() if count > 0])
+def get_emotion_variability(unique_emotions):
     if unique_emotions >= 5:
         return "High emotional variability"
     elif unique_emotions >= 3:
@@ -89,60 +495,117 @@ def get_question(question_id):
         }
     return None
 
-def ensure_question_exists(session_id, question_id):
-    """Ensure question exists, create if it doesn't"""
-    question = get_question(question_id)
-    if not question:
-        # Create question in Redis
-        redis_client.hset(f"question:{question_id}", mapping={
+def get_session_status_and_question(session_id, question_id):
+    """Fetch the session status and the question's owning session, and count a pending frame write, in a single round-trip"""
+    with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hget(f"session:{session_id}", "status")
+        pipe.hget(f"question:{question_id}", "session_id")
+        # Count the frame's write before anything else can end or clear the session.
+        # The TTL drops counters left behind by crashed workers or unknown session IDs.
+        pipe.incr(f"session:{session_id}:pending_writes")
+        pipe.expire(f"session:{session_id}:pending_writes", PENDING_WRITES_TTL_SECONDS)
+        session_status, question_session_id, _, _ = pipe.execute()
+    return session_status, question_session_id
+
+def create_question(session_id, question_id):
+    """Create a question within a session"""
+    # Create question in Redis and add it to session's question list in one round-trip
+    with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hset(f"question:{question_id}", mapping={
             "session_id": session_id,
             "timestamp": datetime.now().isoformat(),
             "total_frames": 0
         })
-        
-        # Add to session's question list
-        redis_client.sadd(f"session:{session_id}:questions", question_id)
-        
-        # Create question directory
-        question_dir = os.path.join(SESSIONS_DIR, session_id, question_id)
-        os.makedirs(question_dir, exist_ok=True)
-
-def update_frame_counts(session_id, question_id):
-    """Increment the frame counts for both session and question"""
-    redis_client.hincrby(f"session:{session_id}", "total_images", 1)
-    redis_client.hincrby(f"question:{question_id}", "total_frames", 1)
+        pipe.sadd(f"session:{session_id}:questions", question_id)
+        pipe.execute()
+    
+    # Create question directory
+    question_dir = os.path.join(SESSIONS_DIR, session_id, question_id)
+    os.makedirs(question_dir, exist_ok=True)
 
 def save_session_results(session_id, results, status="completed"):
     """Save or update session results"""
     redis_client.hset(f"session:{session_id}", mapping={
         "timestamp_end": datetime.now().isoformat(),
         "status": status,
-        "results": json.dumps(results)
+        "results": orjson.dumps(results).decode()
     })
 
+def expire_session(session_id, question_ids):
+    """Set a TTL on all Redis data of an ended session"""
+    keys = [f"session:{session_id}", f"session:{session_id}:questions", f"session:{session_id}:pending_writes"]
+    keys.extend(get_legacy_frame_keys(question_ids))
+    for question_id in question_ids:
+        keys.extend([
+            f"question:{question_id}",
+            f"question:{question_id}:stream",
+            f"question:{question_id}:emotions",
+            f"question:{question_id}:confidence"
+        ])
+    
+    with redis_client.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.expire(key, SESSION_TTL_SECONDS)
+        # Remember when the data expires, so the session's images can be deleted with it
+        pipe.zadd("sessions:expiring", {session_id: time.time() + SESSION_TTL_SECONDS})
+        pipe.execute()
+
+def purge_expired_sessions():
+    """Delete the images of sessions whose Redis data has expired and drop them from the session list"""
+    session_ids = redis_client.zrangebyscore("sessions:expiring", 0, time.time())
+    if not session_ids:
+        return
+    
+    for session_id in session_ids:
+        shutil.rmtree(os.path.join(SESSIONS_DIR, session_id), ignore_errors=True)
+    
+    with redis_client.pipeline(transaction=False) as pipe:
+        pipe.zrem("sessions", *session_ids)
+        pipe.zrem("sessions:expiring", *session_ids)
+        pipe.execute()
+
+def session_purger():
+    """Purge expired sessions every interval, in one worker process at a time"""
+    while True:
+        try:
+            if redis_client.set("sessions:purge_lock", 1, nx=True, ex=SESSION_PURGE_INTERVAL_SECONDS):
+                purge_expired_sessions()
+        except Exception as e:
+            print(f"Error purging expired sessions: {e}")
+        time.sleep(SESSION_PURGE_INTERVAL_SECONDS)
+
+def start_session_purger():
+    """Start purging expired sessions in the background, if sessions are set to expire"""
+    if SESSION_TTL_SECONDS > 0:
+        threading.Thread(target=session_purger, daemon=True).start()
+
 def save_question_results(question_id, results):
     """Save or update question results"""
-    redis_client.hset(f"question:{question_id}", "results", json.dumps(results))
+    redis_client.hset(f"question:{question_id}", "results", orjson.dumps(results).decode())
 
 def get_stored_session_results(session_id):
     """Get stored session results if they exist"""
     results = redis_client.hget(f"session:{session_id}", "results")
-    return json.loads(results) if results else None
+    return orjson.loads(results) if results else None
 
 def get_stored_question_results(question_id):
     """Get stored question results if they exist"""
     results = redis_client.hget(f"question:{question_id}", "results")
-    return json.loads(results) if results else None
+    return orjson.loads(results) if results else None
 
 def get_session_questions(session_id):
     """Get all questions for a session"""
     # Get list of question IDs for this session
-    question_ids = redis_client.smembers(f"session:{session_id}:questions")
+    question_ids = list(redis_client.smembers(f"session:{session_id}:questions"))
+    
+    # Fetch all question data in a single round-trip
+    with redis_client.pipeline(transaction=False) as pipe:
+        for question_id in question_ids:
+            pipe.hgetall(f"question:{question_id}")
+        question_data = pipe.execute()
     
     questions = []
-    for question_id in question_ids:
-        # Get question data
-        q_data = redis_client.hgetall(f"question:{question_id}")
+    for question_id, q_data in zip(question_ids, question_data):
         if not q_data:
             continue
             
@@ -155,7 +618,7 @@ def get_session_questions(session_id):
         # Add results if they exist
         if "results" in q_data and q_data["results"]:
             try:
-                question["results"] = json.loads(q_data["results"])
+                question["results"] = orjson.loads(q_data["results"])
             except:
                 question["results"] = None
                 
@@ -163,26 +626,76 @@ def get_session_questions(session_id):
     
     return questions
 
-def get_question_frames(question_id):
-    """Get all frames for a question"""
-    # Get list of frame IDs for this question
-    frame_ids = redis_client.smembers(f"question:{question_id}:frames")
+def get_legacy_frame_stats(question_id):
+    """Get the emotion and confidence of every frame stored as a frame hash, as frames were before streams"""
+    frame_ids = list(redis_client.smembers(f"question:{question_id}:frames"))
     
-    frames = []
-    for frame_id in frame_ids:
-        # Get frame data
-        f_data = redis_client.hgetall(f"frame:{frame_id}")
-        if not f_data:
-            continue
-            
-        frames.append({
-            "frame_id": frame_id,
-            "timestamp": f_data.get("timestamp"),
-            "emotion": f_data.get("emotion"),
-            "confidence": float(f_data.get("confidence", 0))
-        })
+    # Fetch all frame data in a single round-trip
+    with redis_client.pipeline(transaction=False) as pipe:
+        for frame_id in frame_ids:
+            pipe.hmget(f"frame:{frame_id}", "emotion", "confidence")
+        rows = [row for row in pipe.execute() if row[0]]
     
-    return frames
+    emotions = np.array([emotion for emotion, _ in rows], dtype=str)
+    confidences = np.array([confidence or 0 for _, confidence in rows], dtype=np.float64)
+    
+    return emotions, confidences
+
+def get_legacy_frame_keys(question_ids):
+    """Get the frame hashes and frame sets of questions, as frames were stored before streams"""
+    with redis_client.pipeline(transaction=False) as pipe:
+        for question_id in question_ids:
+            pipe.smembers(f"question:{question_id}:frames")
+        frame_id_sets = pipe.execute()
+    
+    keys = []
+    for question_id, frame_ids in zip(question_ids, frame_id_sets):
+        keys.append(f"question:{question_id}:frames")
+        keys.extend(f"frame:{frame_id}" for frame_id in frame_ids)
+    return keys
+
+def get_question_aggregates(question_id):
+    """Get the running emotion count array, confidence sum and frame count for a question"""
+    with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hgetall(f"question:{question_id}:emotions")
+        pipe.hmget(f"question:{question_id}:confidence", "sum", "count")
+        pipe.scard(f"question:{question_id}:frames")
+        emotion_counts, (confidence_sum, frame_count), legacy_frames = pipe.execute()
+    
+    counts = emotion_count_array(emotion_counts)
+    confidence_sum = float(confidence_sum or 0)
+    frame_count = int(frame_count or 0)
+    
+    if legacy_frames:
+        # Frames recorded before running aggregates existed need a full frame scan
+        emotions, confidences = get_legacy_frame_stats(question_id)
+        unique_emotions, emotion_totals = np.unique(emotions, return_counts=True)
+        counts += emotion_count_array(dict(zip(unique_emotions.tolist(), emotion_totals.tolist())))
+        confidence_sum += float(confidences.sum())
+        frame_count += len(emotions)
+    
+    return counts, confidence_sum, frame_count
+
+def get_confidence_totals(question_ids):
+    """Get the confidence sum and frame count for each of several questions in a single round-trip"""
+    with redis_client.pipeline(transaction=False) as pipe:
+        for question_id in question_ids:
+            pipe.hmget(f"question:{question_id}:confidence", "sum", "count")
+            pipe.scard(f"question:{question_id}:frames")
+        rows = pipe.execute()
+    
+    totals = {}
+    for question_id, (confidence_sum, frame_count), legacy_frames in zip(question_ids, rows[::2], rows[1::2]):
+        confidence_sum = float(confidence_sum or 0)
+        frame_count = int(frame_count or 0)
+        if legacy_frames:
+            # Frames recorded before running aggregates existed need a full frame scan
+            _, confidences = get_legacy_frame_stats(question_id)
+            confidence_sum += float(confidences.sum())
+            frame_count += len(confidences)
+        totals[question_id] = (confidence_sum, frame_count)
+    
+    return totals
 
 @app.route('/start_session', methods=['POST'])
 def start_session():
@@ -205,7 +718,7 @@ def start_session():
         # Add to list of all sessions
         redis_client.zadd("sessions", {session_id: datetime.now().timestamp()})
         
-        return jsonify({
+        return json_response({
             "status": "success",
             "message": "Session started",
             "session_id": session_id
@@ -213,81 +726,71 @@ def start_session():
         
     except Exception as e:
         print(f"Error starting session: {e}")
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}), 500
 
 @app.route('/upload_frame', methods=['POST'])
 def upload_frame():
     """Process and analyze a single frame for a specific question within a session"""
     try:
         if 'image' not in request.files:
-            return jsonify({"error": "No image provided"}), 400
+            return json_response({"error": "No image provided"}), 400
         
         session_id = request.form.get('session_id')
         question_id = request.form.get('question_id')
         
         if not session_id:
-            return jsonify({"error": "No session_id provided"}), 400
+            return json_response({"error": "No session_id provided"}), 400
         if not question_id:
-            return jsonify({"error": "No question_id provided"}), 400
-
-        # Check if session exists and is active
-        session_status = get_session_status(session_id)
-        if not session_status:
-            return jsonify({"error": "Session not found"}), 404
-        if session_status != "active":
-            return jsonify({"error": f"Session is {session_status}, not active"}), 400
-
-        # Ensure question exists (create if it doesn't)
-        ensure_question_exists(session_id, question_id)
+            return json_response({"error": "No question_id provided"}), 400
 
         file = request.files['image']
         if file.filename == '':
-            return jsonify({"error": "No selected file"}), 400
+            return json_response({"error": "No selected file"}), 400
         
         if not allowed_file(file.filename):
-            return jsonify({"error": "File type not allowed"}), 400
-
-        # Create question directory if it doesn't exist
-        question_dir = os.path.join(SESSIONS_DIR, session_id, question_id)
-        os.makedirs(question_dir, exist_ok=True)
-
-        # Process image
-        img = Image.open(file.stream)
-        img = img.resize((48, 48))
-        img = img.convert('L')
-        img_array = img_to_array(img)
-        img_pixels = np.expand_dims(np.expand_dims(img_array, axis=-1), axis=0) / 255.0
-        
-        # Get prediction
-        prediction = model.predict(img_pixels)
-        emotion_index = np.argmax(prediction)
-        confidence = float(prediction[0][emotion_index])
-        emotion = EMOTIONS[emotion_index]
-        
-        # Generate frame ID and timestamp
-        frame_id = str(uuid.uuid4())
-        timestamp = datetime.now().isoformat()  
-        
-        # Save image 
-        img_path = os.path.join(question_dir, f"{frame_id}.jpg")
-        img.save(img_path)
-        
-        # Save frame data to Redis
-        redis_client.hset(f"frame:{frame_id}", mapping={
-            "session_id": session_id,
-            "question_id": question_id,
-            "timestamp": timestamp,
-            "emotion": emotion,
-            "confidence": confidence
-        })
-        
-        # Add to question's frame list
-        redis_client.sadd(f"question:{question_id}:frames", frame_id)
+            return json_response({"error": "File type not allowed"}), 400
+
+        # Check if session exists and is active, counting this frame's write as pending
+        session_status, question_session_id = get_session_status_and_question(session_id, question_id)
+        write_submitted = False
+        try:
+            if not session_status:
+                return json_response({"error": "Session not found"}), 404
+            if session_status != "active":
+                return json_response({"error": f"Session is {session_status}, not active"}), 400
+
+            # Start decoding the image while the question is created
+            decoded = preprocess_pool.submit(decode_face_image, file.read())
 
-        # Update frame counts
-        update_frame_counts(session_id, question_id)
+            # Create question (and its directory) if it doesn't exist yet
+            if not question_session_id:
+                create_question(session_id, question_id)
+            question_dir = os.path.join(SESSIONS_DIR, session_id, question_id)
 
-        return jsonify({
+            # Process image
+            img = decoded.result()
+            img_pixels = img[:, :, np.newaxis].astype(np.float32) / 255.0
+            
+            # Get prediction
+            prediction = predict_emotion_cached(img, img_pixels)
+            emotion_index = np.argmax(prediction)
+            confidence = float(prediction[emotion_index])
+            emotion = EMOTIONS[emotion_index]
+            
+            # Generate frame ID and timestamp (integer nanoseconds since the epoch)
+            frame_id = str(uuid.uuid4())
+            timestamp = time.time_ns()
+            
+            # Record frame in Redis and save image in the background
+            img_path = os.path.join(question_dir, f"{frame_id}.jpg")
+            submit_frame_write(session_id, question_id, frame_id, timestamp, emotion, confidence, img, img_path)
+            write_submitted = True
+        finally:
+            # A frame that never reaches the background writer must not stay pending
+            if not write_submitted:
+                release_frame_write(session_id)
+
+        return json_response({
             "status": "success",
             "session_id": session_id,
             "question_id": question_id,
@@ -296,9 +799,12 @@ def upload_frame():
             "confidence": confidence
         })
 
+    except InferenceUnavailable as e:
+        print(f"Error processing frame: {e}")
+        return json_response({"error": str(e)}), 503
     except Exception as e:
         print(f"Error processing frame: {e}")
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}), 500
 
 @app.route('/end_session', methods=['POST'])
 def end_session():
@@ -306,14 +812,17 @@ def end_session():
     try:
         session_id = request.form.get('session_id')
         if not session_id:
-            return jsonify({"error": "No session_id provided"}), 400
+            return json_response({"error": "No session_id provided"}), 400
 
         # Check if session exists and is active
         session_status = get_session_status(session_id)
         if not session_status:
-            return jsonify({"error": "Session not found"}), 404
+            return json_response({"error": "Session not found"}), 404
         if session_status != "active":
-            return jsonify({"error": f"Session is already {session_status}"}), 400
+            return json_response({"error": f"Session is already {session_status}"}), 400
+        
+        # Make sure every uploaded frame has been recorded before computing results
+        wait_for_frame_writes(session_id)
             
         # Process each question first
         questions = get_session_questions(session_id)
@@ -328,7 +837,11 @@ def end_session():
         # Mark session as completed and save results
         save_session_results(session_id, session_results, "completed")
         
-        return jsonify({
+        # Let Redis drop the session's data once it has been kept long enough
+        if SESSION_TTL_SECONDS > 0:
+            expire_session(session_id, [question["question_id"] for question in questions])
+        
+        return json_response({
             "status": "success",
             "message": "Session ended successfully",
             "session_id": session_id,
@@ -337,50 +850,38 @@ def end_session():
 
     except Exception as e:
         print(f"Error ending session: {e}")
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}), 500
 
 def process_question_data(question_id):
     """Process all data for a question and generate statistics"""
-    # Get all frames for this question
-    frames = get_question_frames(question_id)
+    # Get emotion histogram and confidence totals for this question
+    emotion_counts, confidence_sum, frame_count = get_question_aggregates(question_id)
     
-    if not frames:
+    if not frame_count:
         return {
             "question_id": question_id,
             "error": "No frames found for this question"
         }
 
-    # Extract emotions and confidences
-    emotions = [frame["emotion"] for frame in frames]
-    confidences = [frame["confidence"] for frame in frames]
-    
     # Calculate statistics
-    emotion_counts = Counter(emotions)
-    
-    if emotion_counts:
-        most_common = emotion_counts.most_common(1)[0][0]
-        least_common = min(emotion_counts.items(), key=lambda x: x[1])[0]
-    else:
-        most_common = "None"
-        least_common = "None"
-        
-    avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+    most_common, least_common, unique_emotions = summarize_emotion_counts(emotion_counts)
+    avg_confidence = confidence_sum / frame_count
 
     # Prepare response
     return {
         "question_id": question_id,
-        "total_frames": len(frames),
+        "total_frames": frame_count,
         "average_emotion": most_common,
         "average_confidence": round(avg_confidence, 2),
-        "emotion_distribution": dict(emotion_counts),
+        "emotion_distribution": emotion_distribution(emotion_counts),
         "summary": {
             "most_common_emotion": most_common,
             "least_common_emotion": least_common,
-            "emotion_variability": get_emotion_variability(emotion_counts),
+            "emotion_variability": get_emotion_variability(unique_emotions),
             "overall_trend": analyze_emotion_trend(emotion_counts),
             "notable_observations": [
                 f"{most_common} was the dominant emotion.",
-                f"Detected {len([e for e in emotion_counts if emotion_counts[e] > 0])} different emotions.",
+                f"Detected {unique_emotions} different emotions.",
                 f"Average confidence level: {round(avg_confidence * 100, 1)}%"
             ]
         }
@@ -399,18 +900,18 @@ def process_session_data(session_id):
     
     # Process each question if not already processed
     question_results = []
-    all_emotions = []
-    all_confidences = []
+    emotion_counts = np.zeros(len(EMOTIONS), dtype=np.int64)
     
     for question in questions:
         question_id = question["question_id"]
         
         # Get or process question results
-        if "results" in question and question["results"]:
+        if question.get("results") and "error" not in question["results"]:
             results = question["results"]
         else:
             results = process_question_data(question_id)
-            save_question_results(question_id, results)
+            if "error" not in results:
+                save_question_results(question_id, results)
             
         if "error" in results:
             continue
@@ -422,46 +923,42 @@ def process_session_data(session_id):
             "emotion_distribution": results["emotion_distribution"]
         })
         
-        # Collect emotions for overall statistics
-        for emotion, count in results["emotion_distribution"].items():
-            all_emotions.extend([emotion] * count)
-            
-        # Get frame confidences
-        frames = get_question_frames(question_id)
-        frame_confidences = [frame["confidence"] for frame in frames]
-        all_confidences.extend(frame_confidences)
+        # Merge emotion counts for overall statistics
+        emotion_counts += emotion_count_array(results["emotion_distribution"])
     
-    if not all_emotions:
+    total_frames = int(emotion_counts.sum())
+    if not total_frames:
         return {
             "session_id": session_id,
             "error": "No emotion data found across questions"
         }
     
     # Calculate overall statistics
-    emotion_counts = Counter(all_emotions)
+    most_common, least_common, unique_emotions = summarize_emotion_counts(emotion_counts)
     
-    most_common = emotion_counts.most_common(1)[0][0] if emotion_counts else "None"
-    least_common = min(emotion_counts.items(), key=lambda x: x[1])[0] if emotion_counts else "None"
-    
-    avg_confidence = sum(all_confidences) / len(all_confidences) if all_confidences else 0
+    # Combine the running confidence totals of every question with results
+    confidence_totals = get_confidence_totals([question["question_id"] for question in question_results])
+    confidence_sum = sum(total for total, _ in confidence_totals.values())
+    confidence_count = sum(count for _, count in confidence_totals.values())
+    avg_confidence = confidence_sum / confidence_count if confidence_count else 0
     
     # Prepare overall response
     return {
         "session_id": session_id,
         "total_questions": len(questions),
-        "total_frames": len(all_emotions),
+        "total_frames": total_frames,
         "average_emotion": most_common,
         "average_confidence": round(avg_confidence, 2),
-        "emotion_distribution": dict(emotion_counts),
+        "emotion_distribution": emotion_distribution(emotion_counts),
         "questions": question_results,
         "session_summary": {
             "most_common_emotion": most_common,
             "least_common_emotion": least_common,
-            "emotion_variability": get_emotion_variability(emotion_counts),
+            "emotion_variability": get_emotion_variability(unique_emotions),
             "overall_trend": analyze_emotion_trend(emotion_counts),
             "notable_observations": [
                 f"{most_common} was the dominant emotion across all questions.",
-                f"Detected {len([e for e in emotion_counts if emotion_counts[e] > 0])} different emotions across {len(question_results)} questions.",
+                f"Detected {unique_emotions} different emotions across {len(question_results)} questions.",
                 f"Average confidence level: {round(avg_confidence * 100, 1)}%"
             ]
         }
@@ -475,35 +972,39 @@ def get_question_results():
         session_id = request.args.get('session_id')
         
         if not question_id:
-            return jsonify({"error": "No question_id provided"}), 400
+            return json_response({"error": "No question_id provided"}), 400
         if not session_id:
-            return jsonify({"error": "No session_id provided"}), 400
+            return json_response({"error": "No session_id provided"}), 400
 
         # Check if question exists
         question = get_question(question_id)
         if not question:
-            return jsonify({"error": "Question not found"}), 404
+            return json_response({"error": "Question not found"}), 404
             
         # Verify that question belongs to the specified session
         if question["session_id"] != session_id:
-            return jsonify({"error": "Question does not belong to specified session"}), 400
+            return json_response({"error": "Question does not belong to specified session"}), 400
 
         # Check for stored results first
         stored_results = get_stored_question_results(question_id)
-        if stored_results:
-            return jsonify(stored_results)
+        if stored_results and "error" not in stored_results:
+            return json_response(stored_results)
+        
+        # Make sure frames already uploaded have been recorded before processing them
+        wait_for_frame_writes(session_id)
                 
         # If no stored results, process the data
         results = process_question_data(question_id)
         
-        # Save the results for future requests
-        save_question_results(question_id, results)
+        # Save the results for future requests, unless there is nothing to save yet
+        if "error" not in results:
+            save_question_results(question_id, results)
             
-        return jsonify(results)
+        return json_response(results)
 
     except Exception as e:
         print(f"Error getting question results: {e}")
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}), 500
 
 
 
@@ -513,60 +1014,98 @@ def get_session_results():
     try:
         session_id = request.args.get('session_id')
         if not session_id:
-            return jsonify({"error": "No session_id provided"}), 400
+            return json_response({"error": "No session_id provided"}), 400
 
         # Check if session exists
         session_status = get_session_status(session_id)
         if not session_status:
-            return jsonify({"error": "Session not found"}), 404
+            return json_response({"error": "Session not found"}), 404
 
         # If session is completed, get stored results
         if session_status == "completed":
             stored_results = get_stored_session_results(session_id)
             if stored_results:
-                return jsonify(stored_results)
+                return json_response(stored_results)
+                
+        # Make sure frames already uploaded have been recorded before processing them
+        wait_for_frame_writes(session_id)
                 
         # If session is active or we don't have stored results, process current data
         results = process_session_data(session_id)
         if "error" in results:
-            return jsonify(results), 404
+            return json_response(results), 404
             
         # Include session status in results
         results["session_status"] = session_status
             
-        return jsonify(results)
+        return json_response(results)
 
     except Exception as e:
         print(f"Error getting session results: {e}")
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}), 500
+
+def get_sessions_chunk(session_ids):
+    """Get the listing entries of several sessions in a single round-trip, skipping sessions whose data is gone"""
+    with redis_client.pipeline(transaction=False) as pipe:
+        for session_id in session_ids:
+            pipe.hgetall(f"session:{session_id}")
+        chunk_data = pipe.execute()
+    
+    return [{
+        "session_id": session_id,
+        "start_time": session_data.get("timestamp_start"),
+        "end_time": session_data.get("timestamp_end"),
+        "status": session_data.get("status"),
+        "total_images": int(session_data.get("total_images", 0))
+    } for session_id, session_data in zip(session_ids, chunk_data) if session_data]
+
+def stream_sessions(session_ids, sessions):
+    """Yield the JSON list of sessions piece by piece, starting from the already fetched first chunk"""
+    yield b'{"sessions":['
+    separator = b''
+    start = 0
+    
+    while True:
+        for session in sessions:
+            yield separator + orjson.dumps(session)
+            separator = b','
+        
+        start += SESSION_LIST_CHUNK_SIZE
+        if start >= len(session_ids):
+            break
+        try:
+            sessions = get_sessions_chunk(session_ids[start:start + SESSION_LIST_CHUNK_SIZE])
+        except Exception as e:
+            # The 200 status is already sent, so close the JSON and report the error in it
+            print(f"Error getting all sessions: {e}")
+            yield b'],"error":' + orjson.dumps(str(e)) + b'}'
+            return
+    
+    yield b']}'
 
 @app.route('/get_all_sessions', methods=['GET'])
 def get_all_sessions():
-    """Get list of all sessions"""
+    """Get list of all sessions, optionally paginated with limit and offset"""
     try:
-        # Get all session IDs, ordered by start time (newest first)
-        session_ids = redis_client.zrevrange("sessions", 0, -1)
+        offset = request.args.get('offset', 0, type=int)
+        limit = request.args.get('limit', type=int)
+        if offset < 0 or (limit is not None and limit < 0):
+            return json_response({"error": "offset and limit must be non-negative"}), 400
         
-        sessions = []
-        for session_id in session_ids:
-            # Get session data
-            session_data = redis_client.hgetall(f"session:{session_id}")
-            if not session_data:
-                continue
-                
-            sessions.append({
-                "session_id": session_id,
-                "start_time": session_data.get("timestamp_start"),
-                "end_time": session_data.get("timestamp_end"),
-                "status": session_data.get("status"),
-                "total_images": int(session_data.get("total_images", 0))
-            })
+        # Get the requested page of session IDs, ordered by start time (newest first)
+        if limit == 0:
+            session_ids = []
+        else:
+            stop = offset + limit - 1 if limit is not None else -1
+            session_ids = redis_client.zrevrange("sessions", offset, stop)
         
-        return jsonify({"sessions": sessions})
+        # Fetch the first chunk before streaming, so a Redis failure still gets an error status
+        sessions = get_sessions_chunk(session_ids[:SESSION_LIST_CHUNK_SIZE])
+        return app.response_class(stream_sessions(session_ids, sessions), mimetype='application/json')
         
     except Exception as e:
         print(f"Error getting all sessions: {e}")
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}), 500
 
 @app.route('/get_session_questions', methods=['GET'])
 def get_session_questions_api():
@@ -574,14 +1113,14 @@ def get_session_questions_api():
     try:
         session_id = request.args.get('session_id')
         if not session_id:
-            return jsonify({"error": "No session_id provided"}), 400
+            return json_response({"error": "No session_id provided"}), 400
             
         questions = get_session_questions(session_id)
-        return jsonify({"questions": questions})
+        return json_response({"questions": questions})
         
     except Exception as e:
         print(f"Error getting session questions: {e}")
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}), 500
 
 @app.route('/clear_session', methods=['POST'])
 def clear_session():
@@ -589,53 +1128,57 @@ def clear_session():
     try:
         session_id = request.form.get('session_id')
         if not session_id:
-            return jsonify({"error": "No session_id provided"}), 400
+            return json_response({"error": "No session_id provided"}), 400
 
         # Check if session exists
         session_status = get_session_status(session_id)
         if not session_status:
-            return jsonify({"error": "Session not found"}), 404
+            return json_response({"error": "Session not found"}), 404
+
+        # Let in-flight frame writes finish so they can't recreate deleted data
+        wait_for_frame_writes(session_id)
 
         # Get all questions for this session
-        question_ids = redis_client.smembers(f"session:{session_id}:questions")
+        question_ids = list(redis_client.smembers(f"session:{session_id}:questions"))
+        
+        # Delete frames still stored in the old per-frame hash layout
+        legacy_frame_keys = get_legacy_frame_keys(question_ids)
+        if legacy_frame_keys:
+            redis_client.delete(*legacy_frame_keys)
         
         # For each question, delete its frames and then the question itself
         for question_id in question_ids:
-            # Get all frames for this question
-            frame_ids = redis_client.smembers(f"question:{question_id}:frames")
-            
-            # Delete each frame
-            for frame_id in frame_ids:
-                redis_client.delete(f"frame:{frame_id}")
-                
-            # Delete question's frame set
-            redis_client.delete(f"question:{question_id}:frames")
+            # Delete question's frame stream and running aggregates
+            redis_client.delete(f"question:{question_id}:stream",
+                                f"question:{question_id}:emotions",
+                                f"question:{question_id}:confidence")
             
             # Delete question
             redis_client.delete(f"question:{question_id}")
         
-        # Delete session's question set
-        redis_client.delete(f"session:{session_id}:questions")
+        # Delete session's question set and in-flight write counter
+        redis_client.delete(f"session:{session_id}:questions", f"session:{session_id}:pending_writes")
         
         # Delete session
         redis_client.delete(f"session:{session_id}")
         
-        # Remove from sessions sorted set
+        # Remove from sessions sorted sets
         redis_client.zrem("sessions", session_id)
+        redis_client.zrem("sessions:expiring", session_id)
 
         # Remove session directory if it exists
         session_dir = os.path.join(SESSIONS_DIR, session_id)
         if os.path.exists(session_dir):
             shutil.rmtree(session_dir)
 
-        return jsonify({
+        return json_response({
             "status": "success", 
             "message": f"Session {session_id} and all associated data cleared"
         })
 
     except Exception as e:
         print(f"Error clearing session: {e}")
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}), 500
 
 @app.route('/clear_question', methods=['POST'])
 def clear_question():
@@ -645,26 +1188,27 @@ def clear_question():
         question_id = request.form.get('question_id')
         
         if not session_id or not question_id:
-            return jsonify({"error": "session_id and question_id are required"}), 400
+            return json_response({"error": "session_id and question_id are required"}), 400
         
         # Check if session exists
         session_status = get_session_status(session_id)
         if not session_status:
-            return jsonify({"error": "Session not found"}), 404
+            return json_response({"error": "Session not found"}), 404
         
         # Check if question exists in the session
         if not redis_client.sismember(f"session:{session_id}:questions", question_id):
-            return jsonify({"error": "Question not found in session"}), 404
+            return json_response({"error": "Question not found in session"}), 404
         
-        # Get all frames for this question
-        frame_ids = redis_client.smembers(f"question:{question_id}:frames")
+        # Let in-flight frame writes finish so they can't recreate deleted data
+        wait_for_frame_writes(session_id)
         
-        # Delete each frame
-        for frame_id in frame_ids:
-            redis_client.delete(f"frame:{frame_id}")
+        # Delete frames still stored in the old per-frame hash layout
+        redis_client.delete(*get_legacy_frame_keys([question_id]))
         
-        # Delete question's frame set
-        redis_client.delete(f"question:{question_id}:frames")
+        # Delete question's frame stream and running aggregates
+        redis_client.delete(f"question:{question_id}:stream",
+                            f"question:{question_id}:emotions",
+                            f"question:{question_id}:confidence")
         
         # Delete question
         redis_client.delete(f"question:{question_id}")
@@ -672,14 +1216,14 @@ def clear_question():
         # Remove question from session's question set
         redis_client.srem(f"session:{session_id}:questions", question_id)
         
-        return jsonify({
+        return json_response({
             "status": "success", 
             "message": f"Question {question_id} and all associated data cleared from session {session_id}"
         })
     
     except Exception as e:
         print(f"Error clearing question: {e}")
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}), 500
 
 
 @app.route('/health', methods=['GET'])
@@ -691,12 +1235,14 @@ def health_check():
     except Exception as e:
         redis_status = False
         
-    return jsonify({
+    return json_response({
         "status": "healthy",
-        "model_loaded": True,
+        "model_loaded": predictor is not None,
+        "inference_cache": dict(inference_cache_stats),
         "redis_connected": redis_status,
         "server_time": datetime.now().isoformat()
     })
 
 if __name__ == '__main__':
+    start_session_purger()
     app.run(host='0.0.0.0', port=5110)
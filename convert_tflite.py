@@ -0,0 +1,54 @@
+"""Convert the Keras emotion model to a full-integer quantized TFLite model.
+
+Usage:
+    python convert_tflite.py
+
+Calibration uses the 48x48 grayscale frames saved under session_images/. When
+no saved frames are available, random inputs are used instead, which gives a
+noticeably less accurate quantization.
+"""
+import glob
+import os
+
+import numpy as np
+import tensorflow as tf
+from PIL import Image
+from tensorflow.keras.models import load_model
+
+MODEL_PATH = "modelf1.h5"
+TFLITE_MODEL_PATH = "modelf1.tflite"
+SESSIONS_DIR = "session_images"
+CALIBRATION_SAMPLES = 200
+
+def load_calibration_frames():
+    """Load saved session frames as (1, 48, 48, 1) float32 arrays scaled to [0, 1]"""
+    paths = glob.glob(os.path.join(SESSIONS_DIR, "**", "*.jpg"), recursive=True)
+    frames = []
+    for path in paths[:CALIBRATION_SAMPLES]:
+        img = Image.open(path).convert('L').resize((48, 48))
+        frames.append(np.asarray(img, dtype=np.float32).reshape(1, 48, 48, 1) / 255.0)
+    return frames
+
+def representative_dataset():
+    frames = load_calibration_frames()
+    if not frames:
+        print("No saved frames found, calibrating with random inputs")
+        frames = [np.random.rand(1, 48, 48, 1).astype(np.float32) for _ in range(CALIBRATION_SAMPLES)]
+    for frame in frames:
+        yield [frame]
+
+def main():
+    model = load_model(MODEL_PATH)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+
+    with open(TFLITE_MODEL_PATH, 'wb') as f:
+        f.write(converter.convert())
+    print(f"Wrote {TFLITE_MODEL_PATH}")
+
+if __name__ == '__main__':
+    main()
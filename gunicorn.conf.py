@@ -0,0 +1,32 @@
+import multiprocessing
+import os
+
+bind = "0.0.0.0:5110"
+
+# Each worker runs inference with INFERENCE_THREADS threads, so two threads per worker fill the CPUs.
+# Frame writes are counted in Redis, so a session can be ended or cleared from any worker.
+workers = int(os.environ.get('GUNICORN_WORKERS', max(2, multiprocessing.cpu_count() // 2)))
+
+# Request threads per worker; concurrent uploads in a worker are batched into one model call
+worker_class = "gthread"
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Import the app once in the master and fork it into workers. The model itself is loaded
+# in each worker after the fork, since TensorFlow's runtime does not survive one.
+preload_app = True
+
+timeout = 60
+
+def post_worker_init(worker):
+    """Start background work and load the model before the worker accepts requests"""
+    from app import get_predictor, start_session_purger
+
+    # Threads don't survive the fork from the master, so each worker starts its own
+    start_session_purger()
+
+    # Load the model now, so the first upload doesn't pay for it
+    try:
+        get_predictor()
+    except Exception:
+        # Leave the model to be loaded (and the error reported) on the first upload
+        worker.log.exception("Could not load the model at worker startup")